@@ -1,33 +1,145 @@
 import os
+import sys
 import subprocess
 import re
 import time
 import logging
-import datetime
+import threading
+import queue
+import atexit
+import heapq
+import traceback
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from colorama import init, Fore, Style
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # 初始化 colorama
 init(autoreset=True)
 
-class ColorFormatter(logging.Formatter):
+# 解析 `wm size` 输出中的物理分辨率
+_RES_RE = re.compile(rb'Physical size:\s*(\d+)x(\d+)')
+
+class CachedTimeFormatter(logging.Formatter):
+    """
+    按秒缓存时间字符串的格式化类，同一秒内的日志不再重复调用 localtime 和 strftime。
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_time = (None, None)  # (整数秒, 格式化后的时间字符串)
+
+    def formatTime(self, record, datefmt=None):
+        sec = int(record.created)
+        cached_sec, cached_str = self._cached_time
+        if sec != cached_sec:
+            cached_str = time.strftime(datefmt or self.default_time_format, self.converter(sec))
+            self._cached_time = (sec, cached_str)
+        if datefmt:
+            return cached_str
+        if self.default_msec_format:
+            return self.default_msec_format % (cached_str, record.msecs)
+        return cached_str
+
+class ColorFormatter(CachedTimeFormatter):
     """
     自定义日志格式化类，根据日志级别设置不同的颜色。
     """
+    _COLORS = {
+        logging.DEBUG: Fore.CYAN,
+        logging.INFO: Fore.GREEN,
+        logging.WARNING: Fore.YELLOW,
+        logging.ERROR: Fore.RED,
+        logging.CRITICAL: Fore.RED + Style.BRIGHT,
+    }
+
     def format(self, record):
-        if record.levelno == logging.DEBUG:
-            record.msg = Fore.CYAN + record.msg + Style.RESET_ALL
-        elif record.levelno == logging.INFO:
-            record.msg = Fore.GREEN + record.msg + Style.RESET_ALL
-        elif record.levelno == logging.WARNING:
-            record.msg = Fore.YELLOW + record.msg + Style.RESET_ALL
-        elif record.levelno == logging.ERROR:
-            record.msg = Fore.RED + record.msg + Style.RESET_ALL
-        elif record.levelno == logging.CRITICAL:
-            record.msg = Fore.RED + Style.BRIGHT + record.msg + Style.RESET_ALL
-        return super().format(record)
+        # 只给格式化结果加颜色，不修改 record.msg，避免颜色码写入日志文件
+        return f"{self._COLORS.get(record.levelno, '')}{super().format(record)}{Style.RESET_ALL}"
+
+class BufferedFileHandler(logging.Handler):
+    def __init__(self, filename, encoding='utf-8', bufferSize=64*1024, flushInterval=1.0, softMaxBuffer=128*1024):
+        """
+        带用户态缓冲的文件处理器，日志编码后追加到复用的 bytearray 中，
+        缓冲区超过 bufferSize 或后台线程定时触发时才通过 os.write 写入文件
+        """
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.encoding = encoding
+        self.bufferSize = bufferSize
+        self.flushInterval = flushInterval
+        self.softMaxBuffer = softMaxBuffer
+        self._fd = os.open(self.baseFilename, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+        self._buf = bytearray()
+        self._stop_event = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+
+    def _flush_loop(self):
+        """每隔 flushInterval 秒将缓冲区写入磁盘"""
+        while not self._stop_event.wait(self.flushInterval):
+            try:
+                self.flush()
+            except Exception:
+                # 写盘失败（如磁盘已满）时只报告错误，刷盘线程继续运行
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+
+    def _write_buffer(self):
+        """将缓冲区内容写入文件并清空缓冲区，调用方需持有锁"""
+        written = 0
+        try:
+            with memoryview(self._buf) as view:
+                while written < len(view):
+                    with view[written:] as remaining:
+                        written += os.write(self._fd, remaining)
+        except Exception:
+            # 写入中途失败时去掉已写入的部分，避免下次重复写入
+            del self._buf[:written]
+            raise
+        # 缓冲区被超长日志撑大后重新分配，避免长期占用内存
+        if len(self._buf) > self.softMaxBuffer:
+            self._buf = bytearray()
+        else:
+            self._buf.clear()
+
+    def write(self, data):
+        """将已编码的日志追加到缓冲区，缓冲区满时才写文件"""
+        self.acquire()
+        try:
+            self._buf += data
+            if len(self._buf) >= self.bufferSize:
+                self._write_buffer()
+        finally:
+            self.release()
+
+    def emit(self, record):
+        """格式化并编码日志后写入缓冲区"""
+        try:
+            self.write((self.format(record) + '\n').encode(self.encoding))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """将缓冲区内容写入文件"""
+        self.acquire()
+        try:
+            if self._buf and self._fd is not None:
+                self._write_buffer()
+        finally:
+            self.release()
+
+    def close(self):
+        """停止刷盘线程，写出剩余内容并关闭文件"""
+        self._stop_event.set()
+        self.acquire()
+        try:
+            if self._fd is not None:
+                self.flush()
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+        super().close()
 
 class TimedRotatingFileHandler(logging.Handler):
     def __init__(self, log_file="device_test.log", maxBytes=10*1024*1024, maxFiles=10):
@@ -36,8 +148,10 @@ class TimedRotatingFileHandler(logging.Handler):
         """
         super().__init__()
         self.log_file = log_file
+        self._base, self._ext = log_file.rsplit('.', 1)
         self.maxBytes = maxBytes
         self.maxFiles = maxFiles
+        self.setFormatter(CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s'))
         self.current_file = self._get_new_filename()
         self.current_size = 0
         self.file_handler = self._create_file_handler(self.current_file)
@@ -45,48 +159,76 @@ class TimedRotatingFileHandler(logging.Handler):
 
     def _get_new_filename(self):
         """生成带时间戳的新日志文件名"""
-        base, ext = self.log_file.rsplit('.', 1)
-        now = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        return f"{base}_{now}.{ext}"
+        now = time.strftime('%Y-%m-%d_%H-%M-%S', time.localtime())
+        return f"{self._base}_{now}.{self._ext}"
 
     def _create_file_handler(self, filename):
-        """创建实际的 FileHandler"""
-        file_handler = logging.FileHandler(filename, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        return file_handler
+        """创建实际写文件的 BufferedFileHandler"""
+        return BufferedFileHandler(filename, encoding='utf-8')
 
     def _manage_old_files(self):
-        """管理旧的日志文件，保留最多 maxFiles 个文件"""
-        log_dir = Path(self.log_file).parent
-        base_name = Path(self.log_file).stem
-        extension = Path(self.log_file).suffix
-
-        # 查找所有日志文件并按创建时间排序
-        log_files = sorted(log_dir.glob(f"{base_name}_*{extension}"), key=os.path.getctime)
-
-        # 删除最旧的文件，保留最多 maxFiles 个文件
-        while len(log_files) > self.maxFiles:
-            oldest_file = log_files.pop(0)
-            os.remove(oldest_file)
-            logging.info(f"Deleted old log file: {oldest_file}")
+        """管理旧的日志文件，保留最多 maxFiles 个文件（仅在初始化时扫描目录）"""
+        log_dir = os.path.dirname(self.log_file)
+        base_name, extension = os.path.splitext(os.path.basename(self.log_file))
+        prefix = f"{base_name}_"
+
+        # 一次 scandir 遍历查找所有日志文件并记录创建时间
+        with os.scandir(log_dir or '.') as it:
+            ctimes = {
+                os.path.join(log_dir, entry.name): entry.stat().st_ctime
+                for entry in it
+                if entry.name.startswith(prefix) and entry.name.endswith(extension)
+            }
+
+        # 只挑出超出 maxFiles 的最旧文件删除，无需全量排序
+        excess = len(ctimes) - self.maxFiles
+        if excess > 0:
+            for oldest_file in heapq.nsmallest(excess, ctimes, key=ctimes.get):
+                del ctimes[oldest_file]
+                os.remove(oldest_file)
+                logging.info(f"Deleted old log file: {oldest_file}")
+
+        # 记录保留的文件，之后滚动时直接维护该队列，不再扫描目录
+        self._known_log_files = deque(sorted(ctimes, key=ctimes.get), maxlen=self.maxFiles)
+
+    def _register_new_file(self, filename):
+        """登记滚动生成的新文件，超出 maxFiles 时删除最旧的文件"""
+        if filename in self._known_log_files:
+            return
+        if len(self._known_log_files) == self.maxFiles:
+            oldest_file = self._known_log_files.popleft()
+            try:
+                os.remove(oldest_file)
+                logging.info(f"Deleted old log file: {oldest_file}")
+            except FileNotFoundError:
+                pass
+        self._known_log_files.append(filename)
 
     def emit(self, record):
         """写日志并检查是否需要切换文件"""
-        msg = self.format(record)
-        msg_size = len(msg.encode('utf-8')) + 1  # 计算消息大小 (包括换行符)
-        
-        # 判断是否需要滚动到新文件
-        if self.current_size + msg_size > self.maxBytes:
-            self.file_handler.close()
-            self.current_file = self._get_new_filename()
-            self.file_handler = self._create_file_handler(self.current_file)
-            self.current_size = 0  # 重置当前文件大小
+        # 低于处理器级别的日志直接丢弃，不做任何格式化和计数
+        if record.levelno < self.level:
+            return
 
-            # 管理旧文件
-            self._manage_old_files()
+        try:
+            # 只格式化、编码一次，编码结果既用于统计大小也直接写入文件
+            encoded = (self.format(record) + '\n').encode('utf-8')
+
+            # 判断是否需要滚动到新文件
+            if self.current_size + len(encoded) > self.maxBytes:
+                self.file_handler.flush()
+                self.file_handler.close()
+                self.current_file = self._get_new_filename()
+                self.file_handler = self._create_file_handler(self.current_file)
+                self.current_size = 0  # 重置当前文件大小
 
-        self.file_handler.emit(record)
-        self.current_size += msg_size
+                # 管理旧文件
+                self._register_new_file(self.current_file)
+
+            self.file_handler.write(encoded)
+            self.current_size += len(encoded)
+        except Exception:
+            self.handleError(record)
 
     def close(self):
         """关闭文件处理器"""
@@ -100,37 +242,44 @@ class TimedRotatingFileHandler_(logging.Handler):
         """
         super().__init__()
         self.log_file = log_file
+        self._base, self._ext = log_file.rsplit('.', 1)
         self.maxBytes = maxBytes
+        self.setFormatter(CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s'))
         self.current_file = self._get_new_filename()
         self.current_size = 0
         self.file_handler = self._create_file_handler(self.current_file)
 
     def _get_new_filename(self):
         """生成带时间戳的新日志文件名"""
-        base, ext = self.log_file.rsplit('.', 1)
-        now = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        return f"{base}_{now}.{ext}"
+        now = time.strftime('%Y-%m-%d_%H-%M-%S', time.localtime())
+        return f"{self._base}_{now}.{self._ext}"
 
     def _create_file_handler(self, filename):
-        """创建实际的 FileHandler"""
-        file_handler = logging.FileHandler(filename, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        return file_handler
+        """创建实际写文件的 BufferedFileHandler"""
+        return BufferedFileHandler(filename, encoding='utf-8')
 
     def emit(self, record):
         """写日志并检查是否需要切换文件"""
-        msg = self.format(record)
-        msg_size = len(msg.encode('utf-8')) + 1  # 计算消息大小 (包括换行符)
-        
-        # 判断是否需要滚动到新文件
-        if self.current_size + msg_size > self.maxBytes:
-            self.file_handler.close()
-            self.current_file = self._get_new_filename()
-            self.file_handler = self._create_file_handler(self.current_file)
-            self.current_size = 0  # 重置当前文件大小
+        # 低于处理器级别的日志直接丢弃，不做任何格式化和计数
+        if record.levelno < self.level:
+            return
 
-        self.file_handler.emit(record)
-        self.current_size += msg_size
+        try:
+            # 只格式化、编码一次，编码结果既用于统计大小也直接写入文件
+            encoded = (self.format(record) + '\n').encode('utf-8')
+
+            # 判断是否需要滚动到新文件
+            if self.current_size + len(encoded) > self.maxBytes:
+                self.file_handler.flush()
+                self.file_handler.close()
+                self.current_file = self._get_new_filename()
+                self.file_handler = self._create_file_handler(self.current_file)
+                self.current_size = 0  # 重置当前文件大小
+
+            self.file_handler.write(encoded)
+            self.current_size += len(encoded)
+        except Exception:
+            self.handleError(record)
 
     def close(self):
         """关闭文件处理器"""
@@ -179,40 +328,129 @@ def setup_logger(log_file="device_test.log", console_level=logging.DEBUG, file_l
 
     # 设置日志格式
     # formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    formatter = CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(formatter)
 
     # 使用自定义的颜色格式化器
     color_formatter = ColorFormatter('%(asctime)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(color_formatter)
 
-    # 将处理器添加到日志记录器中
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # 记录器只挂 QueueHandler，格式化和文件/控制台输出交给 QueueListener 线程，避免阻塞调用线程
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
     return logger
 
-def get_device_resolution(device_id):
+class AdbShell:
+    """
+    持久的 adb shell 会话，多条命令复用同一个 adb 进程，避免每条命令都重新启动 adb 并与 adbd 握手。
+    """
+    # 结束标记由 printf 拼出，回显输入的 pty shell 回显的命令行本身不会匹配
+    _END_CMD = "printf '\\n__%s__%d\\n' END $?"
+    _END_RE = re.compile(rb'__END__(\d+)\s*$')
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.process = subprocess.Popen(['adb', '-s', device_id, 'shell'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        # 后台线程逐行读取输出，run 可以按超时等待，不会因设备卡住而永久阻塞
+        self._lines = queue.SimpleQueue()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        """读取 adb 输出放入队列，进程结束时放入 None"""
+        try:
+            for line in self.process.stdout:
+                self._lines.put(line)
+        finally:
+            self._lines.put(None)
+            self.process.stdout.close()
+
+    def run(self, cmd, check=True, timeout=30):
+        """
+        在会话中执行一条命令，读取输出直到命令结束标记。
+
+        参数:
+            cmd (str): 要执行的 shell 命令
+            check (bool): 命令退出码非 0 时是否抛出 CalledProcessError
+            timeout (float): 等待命令结束的最长时间（秒），超时后会话被关闭
+
+        返回:
+            bytes: 命令的输出
+        """
+        self.process.stdin.write(f"{cmd}\n{self._END_CMD}\n".encode())
+        self.process.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        output = []
+        while True:
+            try:
+                line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                # 会话已无法与命令输出对齐，直接结束 adb 进程
+                self.process.kill()
+                raise subprocess.TimeoutExpired(cmd, timeout, b''.join(output))
+            if line is None:
+                raise RuntimeError(f"设备 {self.device_id} 的 adb shell 会话已断开")
+            match = self._END_RE.match(line)
+            if match:
+                returncode = int(match.group(1))
+                break
+            output.append(line)
+
+        # 去掉结束标记前额外输出的换行
+        output = b''.join(output)
+        if output.endswith(b'\r\n'):
+            output = output[:-2]
+        elif output.endswith(b'\n'):
+            output = output[:-1]
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd, output)
+        return output
+
+    def close(self):
+        """退出 shell 会话并等待 adb 进程结束"""
+        try:
+            self.process.stdin.write(b"exit\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self._reader.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+def get_device_resolution(device_id, shell=None):
     """
     获取设备的屏幕分辨率。
 
     参数:
         device_id (str): 设备ID
+        shell (AdbShell): 已打开的 adb shell 会话，为空时单独执行 adb 命令
 
     返回:
         (int, int): 返回设备的宽度和高度，如果获取失败则返回 (None, None)
     """
     try:
         # 使用 adb 命令获取设备屏幕分辨率
-        result = subprocess.run(['adb', '-s', device_id, 'shell', 'wm', 'size'], capture_output=True, text=True)
-        output_lines = result.stdout.split('\n')
+        if shell is not None:
+            output = shell.run('wm size')
+        else:
+            output = subprocess.check_output(['adb', '-s', device_id, 'shell', 'wm', 'size'], stderr=subprocess.DEVNULL)
 
         # 解析分辨率信息
-        for line in output_lines:
-            match = re.match(r'Physical size: (\d+)x(\d+)', line)
-            if match:
-                width, height = match.groups()
-                return int(width), int(height)
+        match = _RES_RE.search(output)
+        if match:
+            width, height = match.groups()
+            return int(width), int(height)
         
         logger.error("无法解析设备的屏幕分辨率")
         return None, None
@@ -227,12 +465,23 @@ def wake_up_and_unlock(device_id):
     参数:
         device_id (str): 设备ID
     """
-    width, height = get_device_resolution(device_id)
-    subprocess.run(['adb', '-s', device_id, 'shell', 'svc', 'power', 'stayon', 'true'], capture_output=True, text=True)
-    logger.info(f"设备 {device_id} 已唤醒")
-    unlock_device_slide(device_id, width, height)
+    # 获取分辨率、唤醒和解锁共用一个 adb shell 会话
+    try:
+        shell = AdbShell(device_id)
+    except Exception as e:
+        logger.error(f"打开设备 {device_id} 的 adb shell 会话失败: {e}")
+        return
+
+    with shell:
+        width, height = get_device_resolution(device_id, shell)
+        try:
+            shell.run('svc power stayon true', check=False)
+            logger.info(f"设备 {device_id} 已唤醒")
+        except Exception as e:
+            logger.error(f"唤醒设备时发生错误: {e}")
+        unlock_device_slide(device_id, width, height, shell)
 
-def unlock_device_slide(device_id, width, height):
+def unlock_device_slide(device_id, width, height, shell=None):
     """
     模拟滑动解锁设备屏幕。
 
@@ -240,6 +489,7 @@ def unlock_device_slide(device_id, width, height):
         device_id (str): 设备ID
         width (int): 设备屏幕的宽度
         height (int): 设备屏幕的高度
+        shell (AdbShell): 已打开的 adb shell 会话，为空时单独执行 adb 命令
     """
     if width is None or height is None:
         logger.error(f"设备 {device_id} 的屏幕宽度或高度无效，无法解锁")
@@ -247,12 +497,16 @@ def unlock_device_slide(device_id, width, height):
 
     try:
         target = min(width, height)
-        subprocess.run(['adb', '-s', device_id, 'shell', 'input', 'swipe', '1', str(target - 100), '1', '1', '200'])
+        swipe = ['input', 'swipe', '1', str(target - 100), '1', '1', '200']
+        if shell is not None:
+            shell.run(' '.join(swipe))
+        else:
+            subprocess.run(['adb', '-s', device_id, 'shell', *swipe])
         logger.info(f"设备 {device_id} 使用滑动解锁成功")
     except Exception as e:
         logger.error(f"解锁设备时发生错误: {e}")
 
-def execute_adb_command(device, class_path, package_name, minutes, throttle, max_workers=5):
+def execute_adb_command(device, class_path, package_name, minutes, throttle, max_workers=5, batch_size=4, delay=10):
     """
     使用ADB命令执行Monkey测试。
 
@@ -262,28 +516,48 @@ def execute_adb_command(device, class_path, package_name, minutes, throttle, max
         package_name (str): 应用包名，或者'all'表示所有应用
         minutes (int): 运行时间（分钟）
         throttle (int): 命令之间的延迟（毫秒）
-        max_workers (int): 最大并发线程数
+        max_workers (int): 最大并发线程数，为 1 时不创建线程池，直接顺序执行
+        batch_size (int): 每批次任务数量
+        delay (int): 批次之间的延迟（秒）
     """
     
     def run_monkey_command(device, class_path, package_name, minutes, throttle):
-        cmd = f"adb -s {device} shell CLASSPATH={class_path} exec app_process /system/bin com.android.commands.monkey.Monkey -p {package_name} --agent reuseq --running-minutes {minutes} --throttle {throttle} --pct-touch 30 -v -v"
+        cmd = ['adb', '-s', device, 'shell', f"CLASSPATH={class_path} exec app_process /system/bin com.android.commands.monkey.Monkey -p {package_name} --agent reuseq --running-minutes {minutes} --throttle {throttle} --pct-touch 30 -v -v"]
         
-        logger.info(f"执行命令: {cmd}")
+        logger.info(f"执行命令: {' '.join(cmd)}")
         logger.info(f"脚本运行时长(分): {minutes}, 执行间隔(秒): {throttle / 1000}")
         
         try:
-            process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, encoding='utf-8')
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=65536)
             
-            for line in process.stdout:
-                logger.info(line.strip())  # 不需要再解码，直接处理字符串
+            # 按 64KB 块读取输出，每块中的完整行合并为一条日志，不完整的尾行留到下一块
+            # INFO 未启用时只读空管道，不做解码和日志记录；启用时直接构造记录交给 handle，跳过 isEnabledFor 和 findCaller
+            info_enabled = logger.isEnabledFor(logging.INFO)
+            fd = process.stdout.fileno()
+            pending = b''
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                if not info_enabled:
+                    continue
+                pending += chunk
+                cut = pending.rfind(b'\n') + 1
+                if cut:
+                    block = '\n'.join(pending[:cut].decode('utf-8', 'replace').splitlines())
+                    pending = pending[cut:]
+                    logger.handle(logger.makeRecord(logger.name, logging.INFO, '', 0, block, (), None))
+            if pending:
+                block = pending.decode('utf-8', 'replace').rstrip('\r\n')
+                logger.handle(logger.makeRecord(logger.name, logging.INFO, '', 0, block, (), None))
+            process.stdout.close()
                 
             # 等待子进程完成
             process.wait()
 
-            # 检查子进程的退出状态
+            # 检查子进程的退出状态（stderr 已合并到 stdout 中输出）
             if process.returncode != 0:
-                stderr_output = process.stderr.read().strip()
-                logger.error(f"包名 {package_name} 运行出错, 错误信息: {stderr_output}")
+                logger.error(f"包名 {package_name} 运行出错, 退出码: {process.returncode}")
             else:
                 logger.info(f"包名 {package_name} 执行完成")
                 
@@ -292,28 +566,37 @@ def execute_adb_command(device, class_path, package_name, minutes, throttle, max
         except Exception as e:
             logger.error(f"未知错误: {e}")
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        if package_name == 'all':
-            cmd = f"adb -s {device} shell pm list packages"
-            process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            packages = [line.split(':')[1] for line in stdout.decode().splitlines() if line.startswith('package:')]
-        else:
-            packages = [package_name]
-        
-        logger.info(f"设备上共安装了 {len(packages)} 个包")
+    if package_name == 'all':
+        cmd = ['adb', '-s', device, 'shell', 'pm', 'list', 'packages']
+        try:
+            stdout = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"获取设备 {device} 的包列表失败: {e}")
+            return
+        packages = [line[8:].decode() for line in stdout.splitlines() if line.startswith(b'package:')]
+    else:
+        packages = [package_name]
+    
+    logger.info(f"设备上共安装了 {len(packages)} 个包")
 
-        batch_size = 4  # 每批次任务数量
-        delay = 10  # 批次之间的延迟，单位：秒
-        
+    # 单线程时直接顺序执行，省去线程池和 Future 的开销
+    executor = None if max_workers == 1 else ThreadPoolExecutor(max_workers=max_workers)
+    try:
         for i in range(0, len(packages), batch_size):
             batch = packages[i:i + batch_size]
             for package in batch:
                 logger.info(f"正在执行包名：{package}")
-            futures = [executor.submit(run_monkey_command, device, class_path, package, minutes, throttle) for package in batch]
-            for future in futures:
-                future.result()
+            if executor is None:
+                for package in batch:
+                    run_monkey_command(device, class_path, package, minutes, throttle)
+            else:
+                futures = [executor.submit(run_monkey_command, device, class_path, package, minutes, throttle) for package in batch]
+                for future in futures:
+                    future.result()
             time.sleep(delay)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
 def push_library(device_id):
     """
@@ -327,11 +610,10 @@ def push_library(device_id):
     base_file_path = os.path.join(dir_path, "FastBot")
     
     try:
-        jar_files = [f for f in os.listdir(base_file_path) if f.endswith(".jar")]
-        for jar_file in jar_files:
-            file_path = os.path.join(base_file_path, jar_file)
-            command = f"adb -s {device_id} push {file_path} {target_path}"
-            subprocess.run(command, shell=True, check=True)
+        # 所有 jar 文件通过一次 adb push 推送
+        jar_paths = [os.path.join(base_file_path, f) for f in os.listdir(base_file_path) if f.endswith(".jar")]
+        if jar_paths:
+            subprocess.run(['adb', '-s', device_id, 'push', *jar_paths, target_path], check=True)
         
         local_files = os.path.join(dir_path, "FastBot", "libs")
         subprocess.run(["adb", "-s", device_id, "push", local_files, "/data/local/tmp/"], check=True)
@@ -341,20 +623,29 @@ def push_library(device_id):
         logger.error(f"推送库文件失败: {e}")
         return False
 
+# adb devices 结果的缓存 (获取时间, 设备列表)，有效期 _DEVICES_CACHE_TTL 秒
+_DEVICES_CACHE_TTL = 0.5
+_devices_cache = None
+
 def get_connected_devices():
     """
-    获取当前连接的设备列表。
+    获取当前连接的设备列表，短时间内重复调用直接返回缓存结果。
 
     返回:
         list: 设备ID的列表
     """
-    result = subprocess.run(['adb', 'devices'], capture_output=True, text=True)
+    global _devices_cache
+    if _devices_cache is not None and time.monotonic() - _devices_cache[0] < _DEVICES_CACHE_TTL:
+        return _devices_cache[1]
+
+    output = subprocess.check_output(['adb', 'devices'], stderr=subprocess.DEVNULL)
     devices = []
-    output_lines = result.stdout.strip().split('\n')
+    output_lines = output.decode('ascii', 'replace').splitlines()
     for line in output_lines[1:]:
         device_info = line.split('\t')
         if len(device_info) == 2 and device_info[1] == 'device':
             devices.append(device_info[0])
+    _devices_cache = (time.monotonic(), devices)
     return devices
 
 def check_device_online(device_id):